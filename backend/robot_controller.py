@@ -1,31 +1,41 @@
 import socket
 import asyncio
 import logging
-from typing import Optional
-import time
+from typing import Awaitable, Callable, Optional
 
 logger = logging.getLogger(__name__)
 
+# Direction and stop commands set robot state, so back-to-back repeats are redundant
+IDEMPOTENT_COMMANDS = frozenset("UDLRH")
+
 class RobotController:
     def __init__(self, ip_address: str, port: int = 65432):
         self.ip_address = ip_address
         self.port = port
-        self.socket: Optional[socket.socket] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
         self.connected = False
-        self.last_command_time = 0
-        self.command_cooldown = 0.1  # 100ms between commands
+        self.last_command_time = 0.0  # event loop (monotonic) time of last write
+        self.flush_interval = 0.008  # 8ms window for coalescing commands
+        self._pending = bytearray()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        # Called when a deferred (coalesced) write fails after send_command returned
+        self.on_send_error: Optional[Callable[[], Awaitable[None]]] = None
         
     async def connect(self) -> bool:
         """Establish TCP connection to Raspberry Pi robot"""
+        if await self.health_check():
+            return True
+        self._close_stream()
+        
         try:
-            # Create socket connection
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(5.0)  # 5 second timeout
-            
-            # Connect to Pi
-            await asyncio.get_event_loop().run_in_executor(
-                None, self.socket.connect, (self.ip_address, self.port)
+            # Open stream connection to Pi (5 second timeout)
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip_address, self.port), 5.0
             )
+            self._configure_socket(self._writer.get_extra_info('socket'))
+            self._watch_task = asyncio.create_task(self._watch_connection(self._reader))
             
             self.connected = True
             logger.info(f"Connected to robot at {self.ip_address}:{self.port}")
@@ -34,67 +44,144 @@ class RobotController:
         except Exception as e:
             logger.error(f"Failed to connect to robot: {e}")
             self.connected = False
-            if self.socket:
-                self.socket.close()
-                self.socket = None
+            self._close_stream()
             return False
     
+    def _close_stream(self):
+        """Drop the stream, its watcher and any queued commands"""
+        # Commands queued for the old link must not reach the new one
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._pending.clear()
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+        if self._writer:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+    
+    def _configure_socket(self, sock: socket.socket):
+        """Tune socket options for small, latency-sensitive command writes"""
+        # No SOCK_CLOEXEC/MSG_NOSIGNAL needed: Python creates sockets non-inheritable
+        # (PEP 446) and ignores SIGPIPE, so a dead Pi surfaces as an exception on write
+        # Commands are single bytes; don't let Nagle hold them back waiting for ACKs
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        
+        # Traffic is a few bytes each way, so keep kernel buffers small
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8192)
+        
+        # Let the kernel detect a dead Pi instead of polling for it
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+    
+    async def _watch_connection(self, reader: asyncio.StreamReader):
+        """Drain robot output and mark the link down once the Pi closes it"""
+        try:
+            while await reader.read(1024):
+                pass
+            if self.connected and reader is self._reader:
+                logger.warning("Robot closed the connection")
+        except Exception as e:
+            logger.warning(f"Robot connection lost: {e}")
+        
+        # A stale watcher must not mark a newer connection as down
+        if reader is self._reader:
+            self.connected = False
+    
     async def disconnect(self):
         """Close connection to robot"""
+        writer = self._writer
         try:
-            if self.socket:
+            if self.is_connected():
                 # Send quit command before closing
                 await self.send_command('Q')
-                self.socket.close()
-                self.socket = None
+                if self._flush_task:
+                    self._flush_task.cancel()
+                    self._flush_task = None
+                await self._flush()
+        finally:
+            self._close_stream()
             self.connected = False
+        
+        if writer:
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass  # Pi already reset the link
             logger.info("Disconnected from robot")
-        except Exception as e:
-            logger.error(f"Error during disconnect: {e}")
     
     async def send_command(self, command: str) -> bool:
-        """Send command to robot with rate limiting"""
-        if not self.connected or not self.socket:
+        """Queue command for the robot, coalescing bursts into a single write"""
+        if not self.connected or not self._writer:
             logger.warning("Cannot send command: not connected to robot")
             return False
         
-        # Rate limiting
-        current_time = time.time()
-        if current_time - self.last_command_time < self.command_cooldown:
-            await asyncio.sleep(self.command_cooldown)
+        data = command.encode()
+        if not (command in IDEMPOTENT_COMMANDS and self._pending.endswith(data)):
+            self._pending += data
+        
+        if self._flush_task is not None:
+            logger.debug(f"Queued command '{command}' for robot")
+            return True
+        
+        # Only wait out whatever remains of the coalescing window
+        now = asyncio.get_running_loop().time()
+        delay = self.flush_interval - (now - self.last_command_time)
+        if delay > 0:
+            self._flush_task = asyncio.create_task(self._flush_after(delay))
+            logger.debug(f"Queued command '{command}' for robot")
+            return True
+        
+        return await self._flush(now)
+    
+    async def _flush_after(self, delay: float):
+        """Flush queued commands once the coalescing window has passed"""
+        await asyncio.sleep(delay)
+        self._flush_task = None
+        if not await self._flush() and self.on_send_error:
+            await self.on_send_error()
+    
+    async def _flush(self, now: Optional[float] = None) -> bool:
+        """Send all queued commands to robot"""
+        if not self._pending or not self._writer:
+            return True
+        
+        payload = bytes(self._pending)
+        self._pending.clear()
+        
+        self.last_command_time = now if now is not None else asyncio.get_running_loop().time()
         
         try:
-            # Send command to robot
-            await asyncio.get_event_loop().run_in_executor(
-                None, self.socket.sendall, command.encode()
-            )
+            self._writer.write(payload)
+            await self._writer.drain()
             
-            self.last_command_time = time.time()
-            logger.debug(f"Sent command '{command}' to robot")
+            logger.debug(f"Sent commands {payload!r} to robot")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to send command '{command}': {e}")
+            logger.error(f"Failed to send commands {payload!r}: {e}")
             self.connected = False
             return False
     
     def is_connected(self) -> bool:
         """Check if robot is connected"""
-        return self.connected and self.socket is not None
+        return self.connected and self._writer is not None
     
     async def health_check(self) -> bool:
         """Check if connection is still alive"""
         if not self.is_connected():
             return False
         
-        try:
-            # Try to get socket status
-            self.socket.settimeout(0.1)
-            ready = self.socket.recv(1, socket.MSG_PEEK)
-            return True
-        except socket.timeout:
-            return True  # Timeout is expected when no data available
-        except Exception as e:
-            logger.warning(f"Health check failed: {e}")
+        # Keepalive probes and the connection watcher keep this state current
+        if self._writer.is_closing():
+            logger.warning("Health check failed: robot connection is closing")
             self.connected = False
-            return False
\ No newline at end of file
+            return False
+        
+        return True
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from robot_controller import RobotController
+
+logger = logging.getLogger(__name__)
+
+class RobotPool:
+    def __init__(self, idle_timeout: float = 60.0):
+        self.idle_timeout = idle_timeout
+        # Idle robot connections keyed by IP, with the time they were released
+        self._idle: Dict[str, Tuple[RobotController, float]] = {}
+        self._evict_task: Optional[asyncio.Task] = None
+        self._closed = False
+    
+    def __contains__(self, ip_address: str) -> bool:
+        return ip_address in self._idle
+    
+    async def acquire(self, ip_address: str) -> Optional[RobotController]:
+        """Take a live pooled robot connection for the given IP, if any"""
+        pooled = self._idle.pop(ip_address, None)
+        if not pooled:
+            return None
+        
+        robot = pooled[0]
+        if await robot.health_check():
+            logger.info(f"Reusing pooled robot connection to {ip_address}")
+            return robot
+        
+        await robot.disconnect()
+        return None
+    
+    async def release(self, robot: RobotController):
+        """Stop robot and keep its connection for the next client"""
+        if self._closed or not robot.is_connected() or not await robot.send_command('H'):
+            await robot.disconnect()
+            return
+        
+        previous = self._idle.pop(robot.ip_address, None)
+        self._idle[robot.ip_address] = (robot, time.monotonic())
+        if previous and previous[0] is not robot:
+            await previous[0].disconnect()
+        
+        if self._evict_task is None:
+            self._evict_task = asyncio.create_task(self._evict_idle())
+        logger.info(f"Robot connection to {robot.ip_address} returned to pool")
+    
+    async def _evict_idle(self):
+        """Close pooled robot connections that are idle too long or have dropped"""
+        while self._idle:
+            now = time.monotonic()
+            expired = [
+                ip for ip, (robot, released) in self._idle.items()
+                if now - released >= self.idle_timeout or not robot.is_connected()
+            ]
+            robots = [self._idle.pop(ip)[0] for ip in expired]
+            for robot in robots:
+                await robot.disconnect()
+                logger.info(f"Closed idle robot connection to {robot.ip_address}")
+            
+            if self._idle:
+                # Wake at the oldest deadline, checking for dropped links in between
+                oldest = min(released for _, released in self._idle.values())
+                delay = oldest + self.idle_timeout - time.monotonic()
+                await asyncio.sleep(max(0.0, min(delay, self.idle_timeout / 2)))
+        
+        self._evict_task = None
+    
+    async def close(self):
+        """Stop eviction and quit every pooled robot"""
+        self._closed = True
+        if self._evict_task:
+            self._evict_task.cancel()
+            self._evict_task = None
+        
+        robots = [robot for robot, _ in self._idle.values()]
+        self._idle.clear()
+        for robot in robots:
+            await robot.disconnect()
@@ -9,7 +9,7 @@ from pydantic import BaseModel, Field
 from typing import List
 import uuid
 from datetime import datetime
-from websocket_handler import websocket_endpoint
+from websocket_handler import manager, websocket_endpoint
 
 
 ROOT_DIR = Path(__file__).parent
@@ -79,4 +79,5 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+    await manager.close()
\ No newline at end of file
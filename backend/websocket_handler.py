@@ -1,18 +1,73 @@
 import asyncio
-import json
+import itertools
+import orjson
 import logging
-from typing import Dict, Optional
+from dataclasses import dataclass
+from typing import Dict
 from fastapi import WebSocket, WebSocketDisconnect
 from robot_controller import RobotController
+from robot_pool import RobotPool
 import ipaddress
 
 logger = logging.getLogger(__name__)
 
+VALID_COMMANDS = frozenset("UDLRWSHQ")
+
+# Pre-serialized responses for the fixed set of replies sent on every command
+_ACK_TEMPLATES = {
+    command: orjson.dumps({
+        "type": "acknowledgment",
+        "message": f"Command '{command}' executed",
+        "command": command
+    }).decode()
+    for command in VALID_COMMANDS
+}
+_STATUS_CONNECTED = orjson.dumps({
+    "type": "status",
+    "message": "Connected to robot",
+    "connected": True
+}).decode()
+_ERR_CONNECT_FAILED = orjson.dumps({
+    "type": "error",
+    "message": "Failed to connect to robot",
+    "connected": False
+}).decode()
+_ERR_NOT_CONNECTED = orjson.dumps({
+    "type": "error",
+    "message": "Robot not connected",
+    "connected": False
+}).decode()
+_ERR_SEND_FAILED = orjson.dumps({
+    "type": "error",
+    "message": "Failed to send command to robot",
+    "connected": False
+}).decode()
+_ERR_INVALID_JSON = orjson.dumps({
+    "type": "error",
+    "message": "Invalid JSON message"
+}).decode()
+_ERR_INVALID_COMMAND = orjson.dumps({
+    "type": "error",
+    "message": "Invalid command"
+}).decode()
+_ERR_UNKNOWN_TYPE = orjson.dumps({
+    "type": "error",
+    "message": "Unknown command type"
+}).decode()
+
+@dataclass(slots=True)
+class ClientConn:
+    websocket: WebSocket
+    robot: RobotController
+    ip_address: str
+    connected: bool = False
+
 class WebSocketManager:
     def __init__(self):
-        self.active_connections: Dict[str, Dict] = {}
+        self.active_connections: Dict[int, ClientConn] = {}
+        self.robot_pool = RobotPool()
     
-    async def connect(self, websocket: WebSocket, client_id: str, ip_address: str):
+    async def connect(self, websocket: WebSocket, client_id: int, ip_address: str):
         """Accept WebSocket connection and establish robot connection"""
         await websocket.accept()
         
@@ -27,62 +82,75 @@ class WebSocketManager:
         robot = RobotController(ip_address)
         
         # Store connection info
-        self.active_connections[client_id] = {
-            "websocket": websocket,
-            "robot": robot,
-            "ip_address": ip_address,
-            "connected": False
-        }
+        self.active_connections[client_id] = ClientConn(websocket, robot, ip_address)
         
-        logger.info(f"WebSocket client {client_id} connected for IP {ip_address}")
+        logger.info(f"WebSocket client {client_id} ({websocket.client.host}) connected for IP {ip_address}")
         return True
     
-    async def disconnect(self, client_id: str):
-        """Disconnect WebSocket and robot"""
+    async def disconnect(self, client_id: int):
+        """Drop WebSocket client and return its robot connection to the pool"""
         if client_id in self.active_connections:
             connection = self.active_connections[client_id]
             
-            # Disconnect robot
-            if connection["robot"]:
-                await connection["robot"].disconnect()
+            # Keep a live robot connection around for the next client
+            connection.robot.on_send_error = None
+            await self.robot_pool.release(connection.robot)
             
             # Remove from active connections
             del self.active_connections[client_id]
             logger.info(f"WebSocket client {client_id} disconnected")
     
-    async def send_message(self, client_id: str, message: dict):
+    async def close(self):
+        """Release pooled robot connections on shutdown"""
+        await self.robot_pool.close()
+    
+    async def send_message(self, client_id: int, message: dict):
         """Send message to WebSocket client"""
         if client_id in self.active_connections:
-            websocket = self.active_connections[client_id]["websocket"]
+            websocket = self.active_connections[client_id].websocket
+            try:
+                await websocket.send_text(orjson.dumps(message).decode())
+            except Exception as e:
+                logger.error(f"Failed to send message to {client_id}: {e}")
+    
+    async def send_raw(self, client_id: int, payload: str):
+        """Send pre-serialized message to WebSocket client"""
+        if client_id in self.active_connections:
+            websocket = self.active_connections[client_id].websocket
             try:
-                await websocket.send_text(json.dumps(message))
+                await websocket.send_text(payload)
             except Exception as e:
                 logger.error(f"Failed to send message to {client_id}: {e}")
     
-    async def handle_robot_connection(self, client_id: str) -> bool:
+    async def handle_robot_connection(self, client_id: int) -> bool:
         """Establish connection to robot"""
         if client_id not in self.active_connections:
             return False
         
         connection = self.active_connections[client_id]
-        robot = connection["robot"]
+        robot = connection.robot
+        
+        # A repeated connect on a live session keeps its current robot link
+        if connection.connected and robot.is_connected():
+            await self.send_raw(client_id, _STATUS_CONNECTED)
+            return True
         
         try:
-            success = await robot.connect()
-            connection["connected"] = success
+            pooled = await self.robot_pool.acquire(connection.ip_address)
+            if pooled:
+                # The session's own controller has no live link; just close it
+                await robot.disconnect()
+                connection.robot = pooled
+                success = True
+            else:
+                success = await robot.connect()
+            connection.connected = success
             
             if success:
-                await self.send_message(client_id, {
-                    "type": "status",
-                    "message": "Connected to robot",
-                    "connected": True
-                })
+                connection.robot.on_send_error = lambda: self.send_raw(client_id, _ERR_SEND_FAILED)
+                await self.send_raw(client_id, _STATUS_CONNECTED)
             else:
-                await self.send_message(client_id, {
-                    "type": "error",
-                    "message": "Failed to connect to robot",
-                    "connected": False
-                })
+                await self.send_raw(client_id, _ERR_CONNECT_FAILED)
             
             return success
             
@@ -95,40 +163,28 @@ class WebSocketManager:
             })
             return False
     
-    async def handle_command(self, client_id: str, command: str) -> bool:
+    async def handle_command(self, client_id: int, command: str) -> bool:
         """Forward command to robot"""
         if client_id not in self.active_connections:
             return False
         
-        connection = self.active_connections[client_id]
-        robot = connection["robot"]
-        
-        if not connection["connected"] or not robot.is_connected():
-            await self.send_message(client_id, {
-                "type": "error",
-                "message": "Robot not connected",
-                "connected": False
-            })
+        # Reject invalid commands before looking at robot state
+        if not isinstance(command, str) or command not in VALID_COMMANDS:
+            await self.send_raw(client_id, _ERR_INVALID_COMMAND)
             return False
         
-        # Validate command
-        valid_commands = ['U', 'D', 'L', 'R', 'W', 'S', 'H', 'Q']
-        if command not in valid_commands:
-            await self.send_message(client_id, {
-                "type": "error", 
-                "message": f"Invalid command: {command}"
-            })
+        connection = self.active_connections[client_id]
+        robot = connection.robot
+        
+        if not connection.connected or not robot.is_connected():
+            await self.send_raw(client_id, _ERR_NOT_CONNECTED)
             return False
         
         try:
             success = await robot.send_command(command)
             
             if success:
-                await self.send_message(client_id, {
-                    "type": "acknowledgment",
-                    "message": f"Command '{command}' executed",
-                    "command": command
-                })
+                await self.send_raw(client_id, _ACK_TEMPLATES[command])
             else:
                 await self.send_message(client_id, {
                     "type": "error",
@@ -148,9 +204,34 @@ class WebSocketManager:
 # Global WebSocket manager instance
 manager = WebSocketManager()
 
+# Source of opaque per-connection client ids
+_next_client_id = itertools.count(1)
+
+# Client message handlers; each returns True when the session should end
+async def _handle_connect(manager: WebSocketManager, client_id: int, message: dict) -> bool:
+    await manager.handle_robot_connection(client_id)
+    return False
+
+async def _handle_command(manager: WebSocketManager, client_id: int, message: dict) -> bool:
+    await manager.handle_command(client_id, message.get("command", ""))
+    return False
+
+async def _handle_disconnect(manager: WebSocketManager, client_id: int, message: dict) -> bool:
+    return True
+
+async def _handle_unknown(manager: WebSocketManager, client_id: int, message: dict) -> bool:
+    await manager.send_raw(client_id, _ERR_UNKNOWN_TYPE)
+    return False
+
+_HANDLERS = {
+    "connect": _handle_connect,
+    "command": _handle_command,
+    "disconnect": _handle_disconnect,
+}
+
 async def websocket_endpoint(websocket: WebSocket, ip_address: str):
     """WebSocket endpoint for robot control"""
-    client_id = f"{websocket.client.host}_{id(websocket)}"
+    client_id = next(_next_client_id)
     
     # Connect WebSocket
     connected = await manager.connect(websocket, client_id, ip_address)
@@ -159,34 +240,24 @@ async def websocket_endpoint(websocket: WebSocket, ip_address: str):
     
     try:
         while True:
-            # Receive message from client
-            data = await websocket.receive_text()
+            # Receive raw frame from client; orjson parses text or bytes directly
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            data = frame.get("text") or frame.get("bytes") or ""
             
             try:
-                message = json.loads(data)
-                command_type = message.get("type", "")
-                
-                if command_type == "connect":
-                    await manager.handle_robot_connection(client_id)
-                
-                elif command_type == "command":
-                    command = message.get("command", "")
-                    await manager.handle_command(client_id, command)
-                
-                elif command_type == "disconnect":
-                    break
-                
+                message = orjson.loads(data)
+                command_type = message.get("type") if isinstance(message, dict) else None
+                if isinstance(command_type, str):
+                    handler = _HANDLERS.get(command_type, _handle_unknown)
                 else:
-                    await manager.send_message(client_id, {
-                        "type": "error",
-                        "message": f"Unknown command type: {command_type}"
-                    })
+                    handler = _handle_unknown
+                if await handler(manager, client_id, message):
+                    break
                     
-            except json.JSONDecodeError:
-                await manager.send_message(client_id, {
-                    "type": "error", 
-                    "message": "Invalid JSON message"
-                })
+            except orjson.JSONDecodeError:
+                await manager.send_raw(client_id, _ERR_INVALID_JSON)
             
     except WebSocketDisconnect:
         logger.info(f"WebSocket client {client_id} disconnected")
@@ -8,6 +8,7 @@ import asyncio
 import json
 import logging
 import os
+import re
 import sys
 import time
 from pathlib import Path
@@ -26,16 +27,14 @@ logger = logging.getLogger(__name__)
 
 class RobotControllerTester:
     def __init__(self):
-        # Get backend URL from frontend env
+        # Get backend URL from the environment, falling back to frontend env
         frontend_env_path = Path(__file__).parent / "frontend" / ".env"
-        self.backend_url = None
+        self.backend_url = os.environ.get("REACT_APP_BACKEND_URL")
         
-        if frontend_env_path.exists():
-            with open(frontend_env_path, 'r') as f:
-                for line in f:
-                    if line.startswith('REACT_APP_BACKEND_URL='):
-                        self.backend_url = line.split('=', 1)[1].strip()
-                        break
+        if not self.backend_url and frontend_env_path.exists():
+            match = re.search(r'^REACT_APP_BACKEND_URL=(\S+)', frontend_env_path.read_text(), re.M)
+            if match:
+                self.backend_url = match.group(1)
         
         if not self.backend_url:
             self.backend_url = "http://localhost:8001"
@@ -49,6 +48,9 @@ class RobotControllerTester:
         
         self.test_results = []
         
+        # Shared HTTP session so requests reuse the same keep-alive connection
+        self.http = requests.Session()
+        
     def log_test_result(self, test_name: str, success: bool, message: str = ""):
         """Log test result"""
         status = "✅ PASS" if success else "❌ FAIL"
@@ -68,7 +70,7 @@ class RobotControllerTester:
     async def test_backend_health(self):
         """Test if backend is running and accessible"""
         try:
-            response = requests.get(f"{self.http_base_url}/api/", timeout=10)
+            response = self.http.get(f"{self.http_base_url}/api/", timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 if data.get("message") == "Hello World":
@@ -308,13 +310,15 @@ class RobotControllerTester:
             print("❌ Backend is not accessible. Cannot proceed with WebSocket tests.")
             return False
         
-        # Run WebSocket tests
-        await self.test_websocket_connection_valid_ip()
-        await self.test_websocket_connection_invalid_ip()
-        await self.test_command_validation()
-        await self.test_message_protocol()
-        await self.test_disconnect_handling()
-        await self.test_multiple_connections()
+        # Run WebSocket tests concurrently; each uses its own robot IP and connection
+        await asyncio.gather(
+            self.test_websocket_connection_valid_ip(),
+            self.test_websocket_connection_invalid_ip(),
+            self.test_command_validation(),
+            self.test_message_protocol(),
+            self.test_disconnect_handling(),
+            self.test_multiple_connections(),
+        )
         
         # Summary
         print("\n" + "=" * 60)
@@ -342,7 +346,10 @@ class RobotControllerTester:
 async def main():
     """Main test runner"""
     tester = RobotControllerTester()
-    success = await tester.run_all_tests()
+    try:
+        success = await tester.run_all_tests()
+    finally:
+        tester.http.close()
     return success
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import asyncio
+import socket
+import struct
+from typing import Callable, List
+
+from robot_controller import RobotController
+
+
+class FakePi:
+    """Local TCP server standing in for the Raspberry Pi robot"""
+
+    def __init__(self):
+        self.received = bytearray()
+        self.writers: List[asyncio.StreamWriter] = []
+        self.connections = 0
+        self.port = None
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.drop_all()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.writers.append(writer)
+        try:
+            while data := await reader.read(1024):
+                self.received += data
+        except ConnectionError:
+            pass
+
+    def drop_all(self):
+        """Close every connection from the Pi side"""
+        for writer in self.writers:
+            writer.close()
+        self.writers.clear()
+
+    def reset_all(self):
+        """Abort every connection from the Pi side with a TCP reset"""
+        for writer in self.writers:
+            sock = writer.get_extra_info("socket")
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            writer.transport.abort()
+        self.writers.clear()
+
+    async def wait_for(self, data: bytes, timeout: float = 2.0):
+        """Wait until the Pi has received the given bytes"""
+        await wait_until(lambda: self.received.endswith(data), timeout)
+
+
+async def wait_until(predicate: Callable[[], bool], timeout: float = 2.0):
+    """Poll until predicate holds, failing the test after timeout seconds"""
+    async def _poll():
+        while not predicate():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(_poll(), timeout)
+
+
+async def connected_robot(pi: FakePi) -> RobotController:
+    robot = RobotController("127.0.0.1", pi.port)
+    assert await robot.connect()
+    return robot
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+
+from tests.fake_pi import FakePi, connected_robot, wait_until
+
+
+def test_idle_command_is_sent_immediately():
+    async def run():
+        async with FakePi() as pi:
+            robot = await connected_robot(pi)
+            assert await robot.send_command("U")
+            assert robot._flush_task is None
+            await pi.wait_for(b"U")
+            await robot.disconnect()
+    asyncio.run(run())
+
+
+def test_burst_is_coalesced_into_one_write():
+    async def run():
+        async with FakePi() as pi:
+            robot = await connected_robot(pi)
+            robot.flush_interval = 0.5
+            await robot.send_command("L")
+            for command in "WSR":
+                assert await robot.send_command(command)
+            assert bytes(robot._pending) == b"WSR"
+            await pi.wait_for(b"LWSR")
+            assert not robot._pending
+            await robot.disconnect()
+    asyncio.run(run())
+
+
+def test_repeated_idempotent_commands_collapse():
+    async def run():
+        async with FakePi() as pi:
+            robot = await connected_robot(pi)
+            robot.flush_interval = 10.0
+            await robot.send_command("H")
+            for command in "UUULLWWDD":
+                await robot.send_command(command)
+            # Direction repeats collapse, speed steps are kept
+            assert bytes(robot._pending) == b"ULWWD"
+            await robot.disconnect()
+    asyncio.run(run())
+
+
+def test_disconnect_flushes_pending_and_quit():
+    async def run():
+        async with FakePi() as pi:
+            robot = await connected_robot(pi)
+            robot.flush_interval = 10.0
+            await robot.send_command("U")
+            await robot.send_command("R")
+            await robot.disconnect()
+            await pi.wait_for(b"URQ")
+            assert not robot.is_connected()
+    asyncio.run(run())
+
+
+def test_deferred_write_failure_is_reported():
+    async def run():
+        async with FakePi() as pi:
+            robot = await connected_robot(pi)
+            errors = []
+
+            async def on_send_error():
+                errors.append(True)
+
+            robot.on_send_error = on_send_error
+            robot.flush_interval = 0.05
+            await robot.send_command("U")
+            await robot.send_command("D")
+            # Break the write side before the queued command is flushed
+            robot._writer.transport.abort()
+            await wait_until(lambda: errors)
+            assert not robot.is_connected()
+    asyncio.run(run())
+
+
+def test_repeated_connect_keeps_the_live_link():
+    async def run():
+        async with FakePi() as pi:
+            robot = await connected_robot(pi)
+            writer = robot._writer
+            assert await robot.connect()
+            assert robot._writer is writer
+            assert robot.is_connected()
+            await robot.disconnect()
+    asyncio.run(run())
+
+
+def test_reconnect_after_link_drop():
+    async def run():
+        async with FakePi() as pi:
+            robot = await connected_robot(pi)
+            pi.drop_all()
+            await wait_until(lambda: not robot.is_connected())
+
+            assert await robot.connect()
+            await wait_until(lambda: pi.connections == 2)
+            # The old watcher must not clear the new link
+            assert robot.is_connected()
+            await robot.send_command("U")
+            await pi.wait_for(b"U")
+            await robot.disconnect()
+    asyncio.run(run())
+
+
+def test_disconnect_after_link_reset(caplog):
+    async def run():
+        async with FakePi() as pi:
+            robot = await connected_robot(pi)
+            pi.reset_all()
+            await wait_until(lambda: not robot.is_connected())
+
+            with caplog.at_level(logging.WARNING):
+                caplog.clear()
+                await robot.disconnect()
+            assert robot._reader is None
+            assert robot._writer is None
+            assert not robot.is_connected()
+            # A link already known to be down is closed quietly
+            assert not caplog.records
+    asyncio.run(run())
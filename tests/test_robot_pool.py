@@ -0,0 +1,106 @@
+import asyncio
+
+from robot_pool import RobotPool
+from tests.fake_pi import FakePi, connected_robot, wait_until
+
+
+def test_release_stops_robot_and_acquire_adopts_it():
+    async def run():
+        async with FakePi() as pi:
+            pool = RobotPool()
+            robot = await connected_robot(pi)
+            await pool.release(robot)
+            await pi.wait_for(b"H")
+            assert "127.0.0.1" in pool
+
+            assert await pool.acquire("127.0.0.1") is robot
+            assert "127.0.0.1" not in pool
+            assert robot.is_connected()
+            assert pi.connections == 1
+            await pool.close()
+            await robot.disconnect()
+    asyncio.run(run())
+
+
+def test_acquire_without_pooled_robot_returns_none():
+    async def run():
+        pool = RobotPool()
+        assert await pool.acquire("127.0.0.1") is None
+    asyncio.run(run())
+
+
+def test_release_replaces_previous_robot_for_same_ip():
+    async def run():
+        async with FakePi() as pi:
+            pool = RobotPool()
+            first = await connected_robot(pi)
+            second = await connected_robot(pi)
+            await pool.release(first)
+            await pool.release(second)
+
+            assert not first.is_connected()
+            assert await pool.acquire("127.0.0.1") is second
+            await pool.close()
+            await second.disconnect()
+    asyncio.run(run())
+
+
+def test_idle_robot_is_evicted_after_timeout():
+    async def run():
+        async with FakePi() as pi:
+            pool = RobotPool(idle_timeout=0.1)
+            robot = await connected_robot(pi)
+            await pool.release(robot)
+
+            await wait_until(lambda: "127.0.0.1" not in pool)
+            assert not robot.is_connected()
+            await pi.wait_for(b"HQ")
+            await pool.close()
+    asyncio.run(run())
+
+
+def test_dropped_link_is_evicted_before_timeout():
+    async def run():
+        async with FakePi() as pi:
+            pool = RobotPool(idle_timeout=3.0)
+            robot = await connected_robot(pi)
+            await pool.release(robot)
+            pi.drop_all()
+
+            # The sweep wakes at half the timeout and finds the dead link
+            await wait_until(lambda: "127.0.0.1" not in pool, timeout=2.5)
+            await pool.close()
+    asyncio.run(run())
+
+
+def test_dropped_link_is_not_adopted():
+    async def run():
+        async with FakePi() as pi:
+            pool = RobotPool()
+            robot = await connected_robot(pi)
+            await pool.release(robot)
+            pi.drop_all()
+            await wait_until(lambda: not robot.is_connected())
+
+            assert await pool.acquire("127.0.0.1") is None
+            await pool.close()
+    asyncio.run(run())
+
+
+def test_close_quits_pooled_robots_and_stops_pooling():
+    async def run():
+        async with FakePi() as pi:
+            pool = RobotPool()
+            robot = await connected_robot(pi)
+            await pool.release(robot)
+            await pool.close()
+
+            assert "127.0.0.1" not in pool
+            assert not robot.is_connected()
+            await pi.wait_for(b"HQ")
+
+            late = await connected_robot(pi)
+            await pool.release(late)
+            assert "127.0.0.1" not in pool
+            assert not late.is_connected()
+    asyncio.run(run())
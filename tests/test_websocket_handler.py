@@ -0,0 +1,161 @@
+import asyncio
+from collections import deque
+from types import SimpleNamespace
+
+import orjson
+
+import websocket_handler
+from robot_controller import RobotController
+from tests.fake_pi import FakePi
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket fed with queued frames"""
+
+    def __init__(self, frames):
+        self.frames = deque(frames)
+        self.sent = []
+        self.client = SimpleNamespace(host="127.0.0.1")
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.close_code = code
+
+    async def send_text(self, data: str):
+        self.sent.append(orjson.loads(data))
+
+    async def receive(self):
+        if self.frames:
+            return self.frames.popleft()
+        return {"type": "websocket.disconnect", "code": 1000}
+
+    @property
+    def messages(self):
+        return [message["message"] for message in self.sent]
+
+
+def text(payload) -> dict:
+    if not isinstance(payload, str):
+        payload = orjson.dumps(payload).decode()
+    return {"type": "websocket.receive", "text": payload}
+
+
+def binary(payload) -> dict:
+    return {"type": "websocket.receive", "bytes": orjson.dumps(payload)}
+
+
+async def _run_session(monkeypatch, frames, pi: FakePi = None, ip_address: str = "127.0.0.1"):
+    manager = websocket_handler.WebSocketManager()
+    monkeypatch.setattr(websocket_handler, "manager", manager)
+    if pi:
+        monkeypatch.setattr(websocket_handler, "RobotController", lambda ip: RobotController(ip, pi.port))
+
+    websocket = FakeWebSocket(frames)
+    await websocket_handler.websocket_endpoint(websocket, ip_address)
+    assert not manager.active_connections
+    await manager.close()
+    return websocket
+
+
+def test_invalid_ip_closes_socket(monkeypatch):
+    websocket = asyncio.run(_run_session(monkeypatch, [], ip_address="not.an.ip"))
+    assert websocket.close_code == 1003
+    assert not websocket.sent
+
+
+def test_invalid_command_rejected_before_connection_check(monkeypatch):
+    websocket = asyncio.run(_run_session(monkeypatch, [
+        text({"type": "command", "command": "X"}),
+        text({"type": "command", "command": "U"}),
+    ]))
+    assert websocket.messages == ["Invalid command", "Robot not connected"]
+
+
+def test_non_string_command_is_invalid(monkeypatch):
+    websocket = asyncio.run(_run_session(monkeypatch, [
+        text({"type": "command", "command": ["U"]}),
+        text({"type": "command", "command": {"U": 1}}),
+        text({"type": "command"}),
+    ]))
+    assert websocket.messages == ["Invalid command"] * 3
+
+
+def test_non_object_json_keeps_session_open(monkeypatch):
+    websocket = asyncio.run(_run_session(monkeypatch, [
+        text("5"),
+        text("null"),
+        text("[1, 2]"),
+        text({"type": "command", "command": "X"}),
+    ]))
+    assert websocket.messages == ["Unknown command type"] * 3 + ["Invalid command"]
+
+
+def test_unknown_and_non_string_types(monkeypatch):
+    websocket = asyncio.run(_run_session(monkeypatch, [
+        text({"type": "unknown_type"}),
+        text({"type": ["connect"]}),
+        text({"command": "U"}),
+    ]))
+    assert websocket.messages == ["Unknown command type"] * 3
+
+
+def test_invalid_json(monkeypatch):
+    websocket = asyncio.run(_run_session(monkeypatch, [
+        text("invalid json"),
+        {"type": "websocket.receive", "bytes": b"\xff"},
+        {"type": "websocket.receive", "text": ""},
+    ]))
+    assert websocket.messages == ["Invalid JSON message"] * 3
+
+
+def test_disconnect_message_ends_session(monkeypatch):
+    websocket = asyncio.run(_run_session(monkeypatch, [
+        text({"type": "disconnect"}),
+        text({"type": "command", "command": "X"}),
+    ]))
+    assert not websocket.sent
+
+
+def test_command_flow_over_text_frames(monkeypatch):
+    async def run():
+        async with FakePi() as pi:
+            websocket = await _run_session(monkeypatch, [
+                text({"type": "connect"}),
+                text({"type": "command", "command": "U", "timestamp": 1642687200000}),
+                text({"type": "disconnect"}),
+            ], pi)
+            assert websocket.sent == [
+                {"type": "status", "message": "Connected to robot", "connected": True},
+                {"type": "acknowledgment", "message": "Command 'U' executed", "command": "U"},
+            ]
+            # The robot is stopped on release and quit when the pool closes
+            await pi.wait_for(b"UHQ")
+    asyncio.run(run())
+
+
+def test_command_flow_over_binary_frames(monkeypatch):
+    async def run():
+        async with FakePi() as pi:
+            websocket = await _run_session(monkeypatch, [
+                binary({"type": "connect"}),
+                binary({"type": "command", "command": "L"}),
+            ], pi)
+            assert websocket.messages == ["Connected to robot", "Command 'L' executed"]
+            await pi.wait_for(b"LHQ")
+    asyncio.run(run())
+
+
+def test_repeated_connect_reuses_robot_link(monkeypatch):
+    async def run():
+        async with FakePi() as pi:
+            websocket = await _run_session(monkeypatch, [
+                text({"type": "connect"}),
+                text({"type": "connect"}),
+                text({"type": "command", "command": "D"}),
+            ], pi)
+            assert websocket.messages == ["Connected to robot"] * 2 + ["Command 'D' executed"]
+            assert pi.connections == 1
+    asyncio.run(run())